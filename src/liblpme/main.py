@@ -15,34 +15,67 @@
 # <http://www.gnu.org/licenses/>.
 
 import os
+import sys
 import time
+import heapq
 import asyncio
+import itertools
+import collections
 from typing import (
     Callable,
     Awaitable,
     Self
 )
 from nacl import bindings
-from hashlib import sha3_256
+from hashlib import blake2b
+from collections import OrderedDict
 from argon2 import exceptions
-from argon2 import PasswordHasher
+from argon2 import low_level
+from argon2 import PasswordHasher, extract_parameters
 from quart import Quart, Response, request, make_response
 
 # utility
 
-async def respond_stream(f:asyncio.StreamReader):
-    while True:
-        chunk = await f.read(65536)
-        if chunk:
-            yield chunk
-        break
+# bounds for the API key verification caches in `SessionManager`
+_VERIFY_CACHE_SIZE = 128
+_REJECT_CACHE_TTL = 5.0
 
+# longest API key that is passed on to Argon2 at all
+_MAX_API_KEY_LENGTH = 512
 
-async def chunk_writer(chunks:list[bytes], to:asyncio.StreamReader):
-    for i in chunks:
-        to.feed_data(len(i).to_bytes(4, "little", signed=False))
-        to.feed_data(i)
-    to.feed_eof()
+# longest session headers that are parsed at all
+_MAX_SESSION_ID_LENGTH = 10
+_MAX_SESSION_TOKEN_LENGTH = 256
+
+# size of the random buffer `SessionManager` cuts session tokens from
+_ENTROPY_POOL_SIZE = 4096
+
+# header names, interned so their hashes are shared
+_HDR_SESSION = sys.intern("X-LPME-Session")
+_HDR_SESSION_ID = sys.intern("X-LPME-Session-Id")
+_HDR_TOKEN = sys.intern("X-LPME-Token")
+_HDR_SERVER_ID = sys.intern("X-LPME-Server-Id")
+_HDR_CHUNK_COUNT = sys.intern("X-LPME-Chunk-Count")
+
+# shared responses for rejected requests
+_UNAUTHORIZED = ("Unauthorized", 401)
+_FORBIDDEN = ("Forbidden", 403)
+
+
+def _lru_put(cache:OrderedDict, key, value, size:int):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > size:
+        cache.popitem(False)
+
+
+def _spawn(tasks:set[asyncio.Task], coro:Awaitable) -> asyncio.Task:
+    # the loop only holds weak references to tasks, so keep them alive
+    # until they're done
+    task = asyncio.get_running_loop().create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
 
 
 # general classes
@@ -55,43 +88,77 @@ class Session:
     `Session.bump()` is called.
     """
 
+    __slots__ = (
+        "id",
+        "unique_id",
+        "__token",
+        "__expiry",
+        "__lifetime",
+        "__loop",
+        "__on_expire",
+        "__on_teardown",
+        "__outgoing",
+        "__outgoing_event",
+        "__outgoing_open",
+        # user code may attach its own per-session state, e.g. in
+        # on_session_start, and hold weak references to sessions
+        "__dict__",
+        "__weakref__"
+    )
+
     id: int
     unique_id: str
 
     __token: bytes
-    __token_str: bytes
     __expiry: float
-    __expire_event: asyncio.Event
     __lifetime: float
-    __expiry_task: asyncio.Task
-    __on_expire: list[Callable[[Self],Awaitable[None]]]
-    __on_teardown: list[Callable[[Self],Awaitable[None]]]
+    __loop: asyncio.AbstractEventLoop
+    __on_expire: tuple[Callable[[Self],Awaitable[None]],...]
+    __on_teardown: tuple[Callable[[Self],Awaitable[None]],...]
     
-    __outgoing: asyncio.Queue[bytes]
+    __outgoing: collections.deque[bytes]
+    __outgoing_event: asyncio.Event
+    __outgoing_open: bool
 
-    def __init__(self, id:int, lifetime:float=30):
+    def __init__(
+        self,
+        id:int,
+        lifetime:float=30,
+        token:bytes|None=None
+    ):
         """Session constructor.
 
         The `lifetime` argument is used as a basis for:
         - The initial time-to-live of the session
         - The lifetime used when bumping the session
+
+        If `token` is given, it is used as the session's 64-byte secret.
+        Otherwise, one is generated using `os.urandom`.
         """
 
+        if token is None:
+            token = os.urandom(64)
+        elif len(token) != 64:
+            raise ValueError("Token must be 64 bytes long")
+
         self.id = id
-        self.unique_id = sha3_256(
-            os.urandom(16)
-            + time.perf_counter_ns().to_bytes(16, "little", signed=True)
-        ).hexdigest()
-
-        self.__token = os.urandom(64)
-        self.__token_str = bytes(self.__token.hex(), "utf8")
-        self.__expiry = time.perf_counter() + lifetime
-        self.__expire_event = asyncio.Event()
+        self.unique_id = os.urandom(32).hex()
+
+        self.__token = token
+        # expiry is kept on the loop's clock, which the manager's
+        # expiry timer also runs on
+        self.__loop = asyncio.get_running_loop()
+        self.__expiry = self.__loop.time() + lifetime
         self.__lifetime = lifetime
-        self.__expiry_task = asyncio.create_task(self.expiry_loop())
-        self.__on_expire = []
-        self.__on_teardown = []
-        self.__outgoing = asyncio.Queue()
+        # listeners are added rarely but iterated on every expiry, so
+        # they're kept as tuples rather than lists
+        self.__on_expire = ()
+        self.__on_teardown = ()
+        # a single consumer and a producer that never waits, so a plain
+        # deque and an event stand in for a full asyncio.Queue
+        self.__outgoing = collections.deque()
+        self.__outgoing_event = asyncio.Event()
+        self.__outgoing_open = True
 
     def on_expire(
         self,
@@ -102,11 +169,13 @@ class Session:
         The callback should take one argument, which is the issuing
         `Session`. It should return an `Awaitable`.
         
-        Expiry callbacks are called when the expiry timer runs out.
-        After all calls are completed, `self.teardown()` is scheduled.
+        Expiry callbacks are called concurrently when the expiry timer
+        runs out. After all calls are completed, `self.teardown()` is
+        run. An exception raised by a callback is reported through the
+        event loop's exception handler.
         """
 
-        self.__on_expire.append(callback)
+        self.__on_expire += (callback,)
         return callback
     
     def on_teardown(
@@ -122,38 +191,54 @@ class Session:
         This is either after it expires, or when it is manually closed.
         """
 
-        self.__on_teardown.append(callback)
+        self.__on_teardown += (callback,)
         return callback
     
-    async def expiry_loop(self):
-        """Run the expiry loop, calling all expiry callbacks when the
-        timer runs out.
-
-        This should not be called; it is started as a task during
-        session construction. If you're a highly trained professional,
-        however, feel free to use this, but prepare for unforeseen
-        consequences.
+    @property
+    def expiry(self) -> float:
+        """The event loop timestamp the session expires at, or
+        `0` if it has already expired or been torn down.
         """
 
-        while True:
-            try:
-                await asyncio.wait_for(self.__expire_event.wait(), self.__lifetime)
-                self.__expire_event.clear()
-            except asyncio.TimeoutError:
-                break
+        return self.__expiry
+
+    async def expire(self):
+        """Expire the session, calling all expiry callbacks. Exceptions
+        raised by the callbacks are reported through the event loop's
+        exception handler.
+
+        This should not be called; the owning `SessionManager` calls it
+        once the expiry timestamp is reached. If you're a highly trained
+        professional, however, feel free to use this, but prepare for
+        unforeseen consequences.
+        """
 
         self.__expiry = 0
-        for i in self.__on_expire:
-            await i(self)
 
-        asyncio.ensure_future(self.teardown(), asyncio.get_running_loop())
+        # listeners are independent, so run them concurrently; a
+        # failing one shouldn't stop the session being torn down, but
+        # it still gets reported
+        if self.__on_expire:
+            results = await asyncio.gather(
+                *(i(self) for i in self.__on_expire),
+                return_exceptions=True
+            )
+
+            for i in results:
+                if isinstance(i, BaseException):
+                    self.__loop.call_exception_handler({
+                        "message": "Exception in session expiry listener",
+                        "exception": i,
+                        "session": self
+                    })
+
+        await self.teardown()
 
-    async def bump(self) -> float:
+    def bump(self) -> float:
         """Bump the session's expiry timer by the lifetime.
         """
 
-        self.__expiry = time.time() + self.__lifetime
-        self.__expire_event.set()
+        self.__expiry = self.__loop.time() + self.__lifetime
         return self.__expiry
     
     async def validate(self, cpt:str|bytes, bump:bool=True) -> bool:
@@ -162,51 +247,69 @@ class Session:
         If `bump` is true, `self.bump()` is called directly afterwards,
         extending the lifetime of the session.
 
-        If `cpt` is a `str`, it is automatically converted to `bytes`.
-        This is because `sodium_memcmp` is used, which provides
-        a secure alternative to `==`.
+        `cpt` is the hex-encoded token, as either a `str` or ASCII
+        `bytes`. It is decoded and compared against the raw token using
+        `sodium_memcmp`, which provides a secure alternative to `==`.
+        Anything that isn't valid hex is rejected outright.
         """
 
-        if isinstance(cpt, str):
-            cpt = bytes(cpt, "utf8")
+        # the compare itself is constant-time and takes nanoseconds, so
+        # it's run inline; mismatched lengths can never be valid
+        if len(cpt) != len(self.__token) * 2:
+            return False
 
-        res = await asyncio.to_thread(
-            bindings.sodium_memcmp,
-            cpt,
-            self.__token_str
-        )
-        if time.perf_counter() >= self.__expiry:
+        try:
+            if isinstance(cpt, bytes):
+                cpt = cpt.decode("ascii")
+            raw = bytes.fromhex(cpt)
+        except ValueError:
+            return False
+
+        # fromhex skips whitespace, so the decoded length can still differ
+        if len(raw) != len(self.__token):
+            return False
+
+        res = bindings.sodium_memcmp(raw, self.__token)
+        if self.__loop.time() >= self.__expiry:
             return False
         
         if res is True and bump is True:
-            await self.bump()
+            self.bump()
 
         return res
 
     async def teardown(self):
         """Shut down the session.
 
-        This clears the token, all expiry hooks and cancels the expiry
-        loop task created at construction.
+        This clears the token and all expiry hooks.
         """
 
-        self.__on_expire.clear()
-        self.__expiry_task.cancel()
+        self.__on_expire = ()
         self.__token = b""
-        self.__token_str = b""
         self.__expiry = 0
         self.__lifetime = -1
-        self.__outgoing.shutdown(True)
+        self.__outgoing_open = False
+        self.__outgoing.clear()
+        self.__outgoing_event.set()
 
         for i in self.__on_teardown:
             await i(self)
 
+    @property
+    def user_token(self) -> str:
+        """The token as a string that can be used as a raw HTTP header.
+        """
+
+        return self.__token.hex()
+
     async def get_user_token(self) -> str:
         """Get the token as a string that can be used as a raw HTTP
         header.
+
+        This is kept for compatibility; prefer `Session.user_token`.
         """
 
-        return str(self.__token_str, "utf8")
+        return self.user_token
 
 
     async def long_poll(self, max_ttl:float=55.0) -> list[bytes]:
@@ -214,32 +317,72 @@ class Session:
         
         The `max_ttl` is used as a hard limit on how long a single poll
         is allowed to take. If this limit is reached, an empty list is
-        returned.
+        returned. An empty list is also returned if the session is torn
+        down while polling.
         """
 
-        res = []
-        try:
-            async with asyncio.timeout(max_ttl):
-                res.append(await self.__outgoing.get())
-            
-            while not self.__outgoing.empty():
-                res.append(self.__outgoing.get_nowait())
-        except asyncio.TimeoutError:
-            pass
+        # if anything is already queued there's no need to arm a
+        # timeout at all
+        if not self.__outgoing and self.__outgoing_open:
+            try:
+                async with asyncio.timeout(max_ttl):
+                    while True:
+                        await self.__outgoing_event.wait()
+
+                        # every waiting poll wakes together, but only
+                        # the first gets the messages; the rest wait on
+                        if self.__outgoing or not self.__outgoing_open:
+                            break
+            except asyncio.TimeoutError:
+                return []
+
+        res = list(self.__outgoing)
+        self.__outgoing.clear()
+
+        # left set once torn down, so later polls return straight away
+        if self.__outgoing_open:
+            self.__outgoing_event.clear()
 
         return res
 
+    async def long_poll_framed(
+        self,
+        max_ttl:float=55.0
+    ) -> tuple[int,bytes]:
+        """Long-poll the outgoing message queue, returning the messages
+        as a single framed buffer.
+
+        This behaves like `Session.long_poll`, but each message is
+        prefixed with its length as a 4-byte little-endian integer, and
+        all of them are joined together. The message count is returned
+        alongside the buffer.
+        """
+
+        chunks = await self.long_poll(max_ttl)
+
+        # joined once at the end, so the payload is only copied once
+        parts = []
+        for i in chunks:
+            parts.append(len(i).to_bytes(4, "little", signed=False))
+            parts.append(i)
+
+        return len(chunks), b"".join(parts)
+
     async def push(self, message:bytes):
         """Push a message to be sent at the next long-poll cycle.
 
         For general use, use `Session.run`.
 
         Messages are inserted into the outgoing queue. As such, if the
-        session has been shut down already, this will fail, as the queue
-        will have also been shut down.
+        session has been shut down already, this will fail with a
+        `RuntimeError`, as the queue will have also been shut down.
         """
 
-        self.__outgoing.put_nowait(message)
+        if not self.__outgoing_open:
+            raise RuntimeError("Session has been torn down")
+
+        self.__outgoing.append(message)
+        self.__outgoing_event.set()
 
     async def run(self, command:str, body:bytes):
         """Push a message to the client to run a command.
@@ -255,6 +398,21 @@ class SessionManager:
     reference.
     """
 
+    __slots__ = (
+        "__sessions",
+        "__key",
+        "__key_type",
+        "__id_prog",
+        "__hasher",
+        "__verify_pepper",
+        "__verify_cache",
+        "__reject_cache",
+        "__entropy",
+        "__expiry_heap",
+        "__expiry_handle",
+        "__expiry_tasks"
+    )
+
     def __init__(self, key:str, hasher:PasswordHasher|None=None):
         """Session manager constructor.
 
@@ -262,16 +420,34 @@ class SessionManager:
         using the provided hasher.
 
         If no hasher is provided, the default Argon2 arguments are used.
+
+        The `key` is parsed once here, so an invalid hash raises
+        `argon2.exceptions.InvalidHashError` straight away rather than
+        on every authentication attempt.
         """
 
         if hasher is None:
             hasher = PasswordHasher()
 
         self.__sessions = {}
-        self.__key = key
-        self.__id_prog = 0
+        # the hash type is only looked up once, rather than by
+        # `PasswordHasher.verify` on every call
+        self.__key = bytes(key, "ascii")
+        self.__key_type = extract_parameters(key).type
+        self.__id_prog = itertools.count().__next__
         self.__hasher = hasher
 
+        # keys are cached by a keyed hash, so the raw API key is never
+        # held in memory past the request
+        self.__verify_pepper = os.urandom(32)
+        self.__verify_cache = OrderedDict()
+        self.__reject_cache = OrderedDict()
+
+        self.__entropy = bytearray()
+        self.__expiry_heap = []
+        self.__expiry_handle = None
+        self.__expiry_tasks = set()
+
     def get_session(self, id:int) -> Session|None:
         """Get a session, using a user-issued ID as a key.
 
@@ -282,9 +458,7 @@ class SessionManager:
         validate the session after it is returned.
         """
 
-        if id in self.__sessions:
-            return self.__sessions[id]
-        return None
+        return self.__sessions.get(id)
     
     async def start_session(self, lifetime:float=30) -> Session:
         """Start a session with the given lifetime.
@@ -293,12 +467,14 @@ class SessionManager:
         to the manager's internal dictionary, and returns it.
         """
 
-        id = self.__id_prog
-        self.__id_prog += 1
+        token = await self.__take_entropy(64)
 
-        ses = Session(id, lifetime)
+        id = self.__id_prog()
+
+        ses = Session(id, lifetime, token)
         self.__sessions[id] = ses
         ses.on_teardown(self.__teardown)
+        self.__schedule_expiry(ses)
         return ses
 
     async def authenticate(self, key:str, lifetime:float=30) -> Session:
@@ -311,13 +487,50 @@ class SessionManager:
         documentation for `argon2.PasswordHasher` for details. Should a
         quantum bit-flip occur, this may also raise a `RuntimeError` on
         fail.
+
+        Verification results are cached, so a key that has already been
+        accepted skips Argon2 entirely, and a rejected key is refused
+        without re-hashing for a short while. Empty, oversized or
+        NUL-containing keys are rejected without hashing.
         """
 
-        if await asyncio.to_thread(
-            self.__hasher.verify,
-            self.__key,
-            key
-        ) is True:
+        if not key or len(key) > _MAX_API_KEY_LENGTH or "\0" in key:
+            raise exceptions.VerifyMismatchError()
+
+        digest = blake2b(
+            bytes(key, "utf8"),
+            digest_size=32,
+            key=self.__verify_pepper
+        ).digest()
+
+        if digest in self.__verify_cache:
+            self.__verify_cache.move_to_end(digest)
+            return await self.start_session(lifetime)
+
+        rejected = self.__reject_cache.get(digest)
+        if rejected is not None:
+            if rejected > time.monotonic():
+                raise exceptions.VerifyMismatchError()
+            del self.__reject_cache[digest]
+
+        try:
+            res = await asyncio.to_thread(
+                low_level.verify_secret,
+                self.__key,
+                bytes(key, self.__hasher.encoding),
+                self.__key_type
+            )
+        except exceptions.VerifyMismatchError:
+            _lru_put(
+                self.__reject_cache,
+                digest,
+                time.monotonic() + _REJECT_CACHE_TTL,
+                _VERIFY_CACHE_SIZE
+            )
+            raise
+
+        if res is True:
+            _lru_put(self.__verify_cache, digest, True, _VERIFY_CACHE_SIZE)
             return await self.start_session(lifetime)
         
         # literally impossible
@@ -326,6 +539,62 @@ class SessionManager:
     async def __teardown(self, ses:Session):
         del self.__sessions[ses.id]
 
+    async def __take_entropy(self, size:int) -> bytes:
+        # tokens are cut from a shared buffer that's refilled in a
+        # worker thread, rather than hitting getrandom() on the loop
+        # for every session
+        if len(self.__entropy) < size:
+            self.__entropy = bytearray(
+                await asyncio.to_thread(os.urandom, _ENTROPY_POOL_SIZE)
+            )
+
+        res = bytes(self.__entropy[:size])
+        del self.__entropy[:size]
+        return res
+
+    def __schedule_expiry(self, ses:Session):
+        entry = (ses.expiry, ses.id)
+        heapq.heappush(self.__expiry_heap, entry)
+
+        # the timer only needs re-arming if it's now set past the
+        # earliest deadline
+        if self.__expiry_handle is not None:
+            if self.__expiry_heap[0] is not entry:
+                return
+            self.__expiry_handle.cancel()
+
+        self.__arm_expiry()
+
+    def __arm_expiry(self):
+        self.__expiry_handle = asyncio.get_running_loop().call_at(
+            self.__expiry_heap[0][0],
+            self.__on_expiry_fire
+        )
+
+    def __on_expiry_fire(self):
+        heap = self.__expiry_heap
+        now = asyncio.get_running_loop().time()
+
+        # a single timer handles every session. bumps don't touch the
+        # heap; stale entries are pushed back with the live expiry when
+        # they come up instead
+        while heap and heap[0][0] <= now:
+            expiry, id = heapq.heappop(heap)
+            ses = self.__sessions.get(id)
+            if ses is None or ses.expiry == 0:
+                continue
+
+            if ses.expiry > expiry:
+                heapq.heappush(heap, (ses.expiry, id))
+                continue
+
+            _spawn(self.__expiry_tasks, ses.expire())
+
+        if heap:
+            self.__arm_expiry()
+        else:
+            self.__expiry_handle = None
+
 
 # main class
 
@@ -362,6 +631,9 @@ class LPMEEndpointApi:
 
         self.__session_open_events = []
         self.__session_shutdown_events = []
+        self.__shutdown_tasks = set()
+
+        self.__dispatch = self.__dispatcher()
 
         app.route(
             self.__base_endpoint,
@@ -382,37 +654,10 @@ class LPMEEndpointApi:
             raise ValueError("Endpoint must start with a trailing '/'")
         
         def wrapper(callback:Callable[...,Awaitable]):
+            dispatch = self.__dispatch
+
             async def handler(*args, **kwargs):
-                ses_tk = request.headers.get(
-                    "X-LPME-Session",
-                    ""
-                )
-                ses_id = request.headers.get(
-                    "X-LPME-Session-Id",
-                    -1,
-                    int
-                )
-                session = self.session_manager.get_session(ses_id)
-
-                if session is None:
-                    return "Unauthorized", 401
-                
-                if await session.validate(ses_tk) is True:
-                    res = await callback(session, *args, **kwargs)
-
-                    if not isinstance(res, Response):
-                        if isinstance(res, tuple):
-                            res = await make_response(*res)
-                        else:
-                            res = await make_response(res)
-
-                    res.headers.set(
-                        "X-LPME-Server-Id",
-                        session.unique_id
-                    )
-                    return res
-                else:
-                    return "Forbidden", 403
+                return await dispatch(callback, args, kwargs)
 
             handler.__name__ = f"handler_{callback.__name__}"
             self.__app.route(
@@ -453,47 +698,89 @@ class LPMEEndpointApi:
         return callback
 
 
+    # event dispatch
+
+    def __dispatcher(self):
+        async def dispatch(callback, args, kwargs):
+            headers = request.headers
+            ses_tk = headers.get(_HDR_SESSION, "")
+            ses_id = headers.get(_HDR_SESSION_ID, "")
+
+            # oversized or non-numeric headers are refused before any
+            # parsing or comparing is done on them. isdecimal() is used
+            # as it only accepts what int() does, unlike isdigit()
+            if len(ses_id) > _MAX_SESSION_ID_LENGTH or not ses_id.isdecimal():
+                return _UNAUTHORIZED
+
+            if len(ses_tk) > _MAX_SESSION_TOKEN_LENGTH:
+                return _UNAUTHORIZED
+            
+            # looked up per request, so auth and events always share
+            # the same manager even if it is replaced
+            session = self.session_manager.get_session(int(ses_id))
+            if session is None:
+                return _UNAUTHORIZED
+            
+            if await session.validate(ses_tk) is True:
+                res = await callback(session, *args, **kwargs)
+
+                # an exact type check covers the common case; subclasses and
+                # other return values take the slower path
+                if type(res) is not Response:
+                    if isinstance(res, tuple):
+                        res = await make_response(*res)
+                    elif not isinstance(res, Response):
+                        res = await make_response(res)
+
+                res.headers[_HDR_SERVER_ID] = session.unique_id
+                return res
+            else:
+                return _FORBIDDEN
+
+        return dispatch
+
     # base handlers
 
     async def __hndl_auth(self):
-        api_key = request.headers.get("X-LPME-Token", "")
+        api_key = request.headers.get(_HDR_TOKEN, "")
 
         try:
             ses = await self.session_manager.authenticate(
                 api_key,
                 self.__lifetime
             )
-            token = await ses.get_user_token()
 
             for i in self.__session_open_events:
                 await i(ses)
 
-            response = Response("", 200, mimetype="text/plain")
-            response.headers.set("X-LPME-Session-Id", str(ses.id))
-            response.headers.set("X-LPME-Session", token)
-            response.headers.set("X-LPME-Server-Id", ses.unique_id)
-            return response
+            return Response(
+                b"",
+                200,
+                {
+                    _HDR_SESSION_ID: str(ses.id),
+                    _HDR_SESSION: ses.user_token,
+                    _HDR_SERVER_ID: ses.unique_id
+                },
+                mimetype="text/plain"
+            )
 
         except exceptions.Argon2Error:
-            return "Unauthorized", 401
+            return _UNAUTHORIZED
 
     async def __hndl_shutdown(self, ses:Session):
         await ses.teardown()
 
         for i in self.__session_shutdown_events:
-            asyncio.create_task(i, ses)
+            _spawn(self.__shutdown_tasks, i(ses))
 
         return ""
 
     async def __hndl_longpoll(self, ses:Session):
-        f = asyncio.StreamReader()
-        chunks = await ses.long_poll()
-        asyncio.create_task(chunk_writer(chunks, f))
+        count, body = await ses.long_poll_framed()
 
-        res = Response(
-            respond_stream(f),
+        return Response(
+            body,
             200,
+            {_HDR_CHUNK_COUNT: str(count)},
             mimetype="application/x-lpme-chunks"
         )
-        res.headers.set("X-LPME-Chunk-Count", str(len(chunks)))
-        return res
@@ -21,6 +21,8 @@ from typing import Callable, Awaitable
 # player handling
 
 class Player:
+    __slots__ = ("user_id", "name")
+
     def __init__(self, id:int, name:str):
         self.user_id = id
         self.name = name
@@ -40,18 +42,27 @@ class Player:
         return self.name
 
 class Playerlist:
-    __servers: dict[main.Session,set[Player]]
+    __slots__ = (
+        "__servers",
+        "__sessions",
+        "__players",
+        "__on_player_join",
+        "__on_player_leaving"
+    )
+
+    __servers: dict[str,dict[int,Player]]
+    __sessions: dict[str,main.Session]
     __players: dict[int,str]
 
     def __init__(self, wraps:main.LPMEEndpointApi):
         self.__servers = {}
+        self.__sessions = {}
         self.__players = {}
 
         self.__on_player_join = None
         self.__on_player_leaving = None
 
         wraps.on_session_start(self.__evt_session_start)
-        wraps.on_session_end(self.__evt_session_end)
         wraps.event("/plrlist/join")(self.__hdl_plr_join)
         wraps.event("/plrlist/left")(self.__hdl_plr_left)
 
@@ -86,8 +97,8 @@ class Playerlist:
         **Only one leaving handler can exist for a player list. Calling
         this again will override any existing handler.**
 
-        The leaving handler is called after a player has been added to a
-        server's playerlist. The returned value is used directly as the
+        The leaving handler is called after a player has been removed from
+        a server's playerlist. The returned value is used directly as the
         Quart endpoint response, so it must adhere to request handler
         rules.
 
@@ -111,72 +122,113 @@ class Playerlist:
 
         return self.__players.get(id)
     
+    def get_player_server_by_id(self, id:int) -> main.Session:
+        """Get the server a player is currently in, using their user ID.
+        Throws `KeyError` if the player is not in a server.
+
+        The returned object is the server session the player is in.
+        """
+
+        uid = self.__players.get(id)
+
+        if uid is None:
+            raise KeyError(str(id))
+        return self.__sessions[uid]
+
+    def get_player_server_by_player(self, plr:Player) -> main.Session:
+        """Get the server a player is currently in. Throws `KeyError` if
+        the player is not in a server.
+
+        The returned object is the server session the player is in.
+        """
+
+        return self.get_player_server_by_id(plr.user_id)
+
     def get_player_server(self, plr:Player|int) -> main.Session:
         """Get the server a player is currently in. Throws `KeyError` if
         the player is not in a server.
 
-        `plr` can be either a `Player` instance or a user ID.
+        `plr` can be either a `Player` instance or a user ID. If the type
+        is already known, use `get_player_server_by_id` or
+        `get_player_server_by_player` instead.
 
         The returned object is the server session the player is in.
         """
 
         if isinstance(plr, Player):
-            plr = plr.user_id
+            return self.get_player_server_by_player(plr)
+        return self.get_player_server_by_id(plr)
 
-        uid = self.get_player_server_uid(plr)
+    def is_player_active_by_id(self, id:int) -> bool:
+        """Check if a player is in a server, using their user ID. Return
+        `True` if they are.
+        """
 
-        if uid is None:
-            raise KeyError(str(plr))
-        return self.__servers[uid]
+        return id in self.__players
 
     def is_player_active(self, plr:Player|int) -> bool:
         """Check if a player is in a server. Return `True` if they are.
 
-        `plr` can be either a `Player` instance or a user ID.
+        `plr` can be either a `Player` instance or a user ID. If a user
+        ID is already known, use `is_player_active_by_id` instead.
         """
 
         if isinstance(plr, Player):
             plr = plr.user_id
 
-        return self.get_player_server_uid(plr) is not None
+        return plr in self.__players
 
 
     async def __evt_session_start(self, ses:main.Session):
-        self.__servers[ses.unique_id] = set()
+        self.__servers[ses.unique_id] = {}
+        self.__sessions[ses.unique_id] = ses
+
+        # teardown covers both expiry and shutdown
+        ses.on_teardown(self.__evt_session_end)
 
     async def __evt_session_end(self, ses:main.Session):
-        plrs = self.__servers[ses.unique_id]
+        plrs = self.__servers.get(ses.unique_id)
+
+        # already cleaned up by an earlier teardown
+        if plrs is None:
+            return
 
-        for i in plrs:
+        # copied, since leaving removes players from the dict
+        for i in list(plrs.values()):
             await self.__evt_plr_left(ses, i)
 
         del self.__servers[ses.unique_id]
+        del self.__sessions[ses.unique_id]
 
     async def __evt_plr_join(self, ses:main.Session, plr:Player):
-        self.__servers[ses.unique_id].add(plr)
+        self.__servers[ses.unique_id][plr.user_id] = plr
         self.__players[plr.user_id] = ses.unique_id
 
         if self.__on_player_join:
-            return await self.__on_player_join()
+            return await self.__on_player_join(ses, plr)
         return ""
     
     async def __evt_plr_left(self, ses:main.Session, plr:Player):
-        self.__servers[ses.unique_id].remove(plr)
+        del self.__servers[ses.unique_id][plr.user_id]
         del self.__players[plr.user_id]
 
         if self.__on_player_leaving:
-            return await self.__on_player_leaving(plr)
+            return await self.__on_player_leaving(ses, plr)
         return ""
     
 
     async def __hdl_plr_join(self, ses:main.Session):
-        payload = await request.get_json(True, cache=False)
+        payload = await request.get_json(True)
         plr = Player(payload["id"], payload["name"])
 
         return await self.__evt_plr_join(ses, plr)
     
     async def __hdl_plr_left(self, ses:main.Session):
-        payload = await request.get_json(True, cache=False)
-        plr = Player(payload["id"], payload["name"])
+        payload = await request.get_json(True)
+
+        # only the id is needed; reuse the player stored on join
+        plr = self.__servers[ses.unique_id].get(payload["id"])
+        if plr is None:
+            return "Not Found", 404
 
         return await self.__evt_plr_left(ses, plr)
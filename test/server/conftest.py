@@ -24,25 +24,28 @@ import signal
 import requests
 import subprocess
 
-# main fixture
+# server launcher
 
-@pytest.fixture(scope="session", autouse=True)
-def lpme():
+def launch(port:int, *args:str):
     proc = subprocess.Popen([
         sys.executable,
-        os.path.dirname(os.path.abspath(__file__)) + "/server.py"
+        os.path.dirname(os.path.abspath(__file__)) + "/server.py",
+        str(port),
+        *args
     ])
     time.sleep(1)
 
     for i in range(9):
         try:
-            requests.get("http://localhost:8080")
+            requests.get(f"http://localhost:{port}")
             break
         except requests.ConnectionError:
             time.sleep(1)
 
-    yield "http://localhost:8080/lpme"
+    return proc
+
 
+def stop(proc:subprocess.Popen):
     proc.send_signal(signal.SIGINT)
     
     try:
@@ -50,6 +53,26 @@ def lpme():
     except subprocess.TimeoutExpired:
         proc.kill()
 
+# main fixture
+
+@pytest.fixture(scope="session", autouse=True)
+def lpme():
+    proc = launch(8080)
+
+    yield "http://localhost:8080/lpme"
+
+    stop(proc)
+
+# short-lifetime fixture
+
+@pytest.fixture(scope="session")
+def lpme_short():
+    proc = launch(8081, "1")
+
+    yield "http://localhost:8081/lpme"
+
+    stop(proc)
+
 # auth fixture
 
 class AuthFixtureResult:
@@ -76,3 +99,23 @@ def auth(lpme):
         res.headers.get("X-LPME-Session"),
         res.headers.get("X-LPME-Server-Id")
     )
+
+# fresh session on the short-lifetime server
+
+@pytest.fixture
+def auth_short(lpme_short):
+    res = requests.post(
+        lpme_short,
+        headers={
+            "X-LPME-Token": "test"
+        }
+    )
+    
+    if not res.ok:
+        raise RuntimeError("Server reject")
+    
+    return AuthFixtureResult(
+        res.headers.get("X-LPME-Session-Id"),
+        res.headers.get("X-LPME-Session"),
+        res.headers.get("X-LPME-Server-Id")
+    )
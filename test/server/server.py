@@ -18,9 +18,15 @@
 
 import sys
 import liblpme
+from liblpme import util
 from quart import Quart, request
 from argon2 import PasswordHasher
 
+# options: [port] [lifetime]
+
+port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+lifetime = float(sys.argv[2]) if len(sys.argv) > 2 else 90
+
 # app init
 
 app = Quart(__name__)
@@ -29,9 +35,40 @@ lpme = liblpme.LPMEEndpointApi(
     app,
     api_key=hasher.hash("test"),
     hasher=hasher,
-    lifetime=90
+    lifetime=lifetime
 )
 
+plrlist = util.Playerlist(lpme)
+
+# player hooks, which reply with the arguments they were called with
+
+async def plr_join(ses:liblpme.Session, plr:util.Player):
+    return f"{ses.unique_id} {plr.user_id} {plr.name}"
+
+
+async def plr_left(ses:liblpme.Session, plr:util.Player):
+    return f"{ses.unique_id} {plr.user_id} {plr.name}"
+
+
+@app.before_serving
+async def setup_plrlist():
+    await plrlist.on_join(plr_join)
+    await plrlist.on_leaving(plr_left)
+
+# unique ids of sessions whose shutdown handlers have run
+ended = set()
+
+# session hooks
+
+@lpme.on_session_start
+async def start_session(ses:liblpme.Session):
+    ses.started = True
+
+
+@lpme.on_session_end
+async def end_session(ses:liblpme.Session):
+    ended.add(ses.unique_id)
+
 # commands
 
 @lpme.event("/test")
@@ -44,13 +81,37 @@ async def evt_run(ses:liblpme.Session):
     await ses.run("test", await request.get_data(False))
     return "ok"
 
+
+@lpme.event("/slash/")
+async def evt_slash(ses:liblpme.Session):
+    return "ok"
+
+@lpme.event("/state")
+async def evt_state(ses:liblpme.Session):
+    return "ok" if ses.started else "missing"
+
 # root
 
 @app.route("/")
 async def home():
     return "ok"
 
+
+@app.route("/players/<int:id>")
+async def player_server(id:int):
+    try:
+        return plrlist.get_player_server(id).unique_id
+    except KeyError:
+        return "Not Found", 404
+
+
+@app.route("/ended/<uid>")
+async def session_ended(uid:str):
+    if uid in ended:
+        return "ok"
+    return "Not Found", 404
+
 # launcher
 
 if __name__ == "__main__":
-    app.run("127.0.0.1", 8080, use_reloader=False)
+    app.run("127.0.0.1", port, use_reloader=False)
@@ -21,6 +21,7 @@ import io
 import time
 import pytest
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # valid event
 
@@ -83,3 +84,144 @@ def test_event_huge(lpme, auth):
             return
         
     raise RuntimeError("Server did not respond with an event")
+
+# unregistered event
+
+def test_event_missing(lpme, auth):
+    res = requests.post(
+        f"{lpme}/missing",
+        "",
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if res.status_code in range(500, 599):
+        raise ValueError("Server error for missing event")
+
+    assert res.status_code == 404
+
+# event registered with a trailing slash
+
+def test_event_slash(lpme, auth):
+    res = requests.post(
+        f"{lpme}/slash",
+        "",
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        },
+        allow_redirects=False
+    )
+
+    assert res.status_code == 308
+    assert res.headers.get("Location").endswith("/lpme/slash/")
+
+# event with a method other than POST
+
+def test_event_method(lpme, auth):
+    res = requests.get(
+        f"{lpme}/test",
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    assert res.status_code == 405
+    assert "POST" in res.headers.get("Allow")
+
+    res = requests.get(f"{lpme}/missing")
+
+    assert res.status_code == 404
+
+# client-issued event larger than a single read
+
+def test_event_huge_body(lpme, auth):
+    sample = os.urandom(65536).hex()
+
+    res = requests.post(
+        f"{lpme}/run",
+        sample,
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    time.sleep(1)
+
+    res = requests.post(
+        f"{lpme}/liblpme/longpoll",
+        "",
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+    
+    buf = io.BytesIO(res.content)
+
+    chunks = int(res.headers.get("X-LPME-Chunk-Count"))
+    for i in range(chunks):
+        data = buf.read(int.from_bytes(buf.read(4), "little", signed=False))
+        sep = data.find(b"\0")
+        command = str(data[:sep], "utf8")
+        content = str(data[sep+1:], "utf8")
+
+        if command == "test":
+            assert content == sample
+            return
+        
+    raise RuntimeError("Server did not respond with an event")
+
+# overlapping long-polls on one session
+
+def test_event_longpoll_overlap(lpme):
+    res = requests.post(
+        lpme,
+        headers={
+            "X-LPME-Token": "test"
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Server reject")
+
+    headers = {
+        "X-LPME-Session-Id": res.headers.get("X-LPME-Session-Id"),
+        "X-LPME-Session": res.headers.get("X-LPME-Session")
+    }
+
+    def poll():
+        return requests.post(
+            f"{lpme}/liblpme/longpoll",
+            "",
+            headers=headers
+        )
+
+    with ThreadPoolExecutor(2) as pool:
+        polls = [pool.submit(poll), pool.submit(poll)]
+        time.sleep(0.5)
+
+        requests.post(f"{lpme}/run", "first", headers=headers)
+        done, pending = wait(polls, 2)
+
+        # only one poll gets the message, the other keeps waiting
+        assert len(done) == 1
+        assert len(pending) == 1
+
+        requests.post(f"{lpme}/run", "second", headers=headers)
+        done, pending = wait(polls, 5)
+
+        assert len(pending) == 0
+
+    for i in polls:
+        res = i.result()
+
+        assert res.ok
+        assert res.headers.get("X-LPME-Chunk-Count") == "1"
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+
+# This file is part of LibLPME.
+
+# LibLPME is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3, or (at your option) any
+# later version.
+
+# LibLPME is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+# for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with LibLPME; see the file LICENSE.md.  If not see
+# <http://www.gnu.org/licenses/>.
+
+import time
+import pytest
+import requests
+
+# session used after its lifetime
+
+def test_expiry(lpme_short, auth_short):
+    time.sleep(2)
+
+    res = requests.post(
+        f"{lpme_short}/test",
+        "",
+        headers={
+            "X-LPME-Session-Id": auth_short.session_id,
+            "X-LPME-Session": auth_short.session
+        }
+    )
+
+    assert res.status_code == 401
+
+# session kept alive by using it
+
+def test_expiry_bump(lpme_short, auth_short):
+    headers = {
+        "X-LPME-Session-Id": auth_short.session_id,
+        "X-LPME-Session": auth_short.session
+    }
+
+    for i in range(5):
+        time.sleep(0.4)
+        res = requests.post(f"{lpme_short}/test", "", headers=headers)
+
+        if not res.ok:
+            raise RuntimeError("Bumped session was rejected")
+
+    time.sleep(2)
+
+    res = requests.post(f"{lpme_short}/test", "", headers=headers)
+
+    assert res.status_code == 401
+
+# players removed when their server expires
+
+def test_expiry_players(lpme_short, auth_short):
+    res = requests.post(
+        f"{lpme_short}/plrlist/join",
+        json={"id": 1, "name": "Player"},
+        headers={
+            "X-LPME-Session-Id": auth_short.session_id,
+            "X-LPME-Session": auth_short.session
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+
+    root = lpme_short.removesuffix("/lpme")
+    res = requests.get(f"{root}/players/1")
+
+    assert res.text == auth_short.server_id
+
+    time.sleep(2)
+
+    res = requests.get(f"{root}/players/1")
+
+    assert res.status_code == 404
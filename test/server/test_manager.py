@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+
+# This file is part of LibLPME.
+
+# LibLPME is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3, or (at your option) any
+# later version.
+
+# LibLPME is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+# for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with LibLPME; see the file LICENSE.md.  If not see
+# <http://www.gnu.org/licenses/>.
+
+import time
+import asyncio
+import pytest
+from liblpme import main
+from argon2 import PasswordHasher, exceptions
+
+hasher = PasswordHasher(time_cost=1, memory_cost=64)
+
+# counts calls to Argon2, optionally replacing it
+
+class Verifier:
+    def __init__(self, monkeypatch, fake:bool=False):
+        self.calls = 0
+        self.__real = main.low_level.verify_secret
+        self.__fake = fake
+
+        monkeypatch.setattr(main.low_level, "verify_secret", self)
+
+    def __call__(self, hash:bytes, secret:bytes, type):
+        self.calls += 1
+
+        # any key starting with "good" is accepted
+        if self.__fake:
+            if secret.startswith(b"good"):
+                return True
+            raise exceptions.VerifyMismatchError()
+        return self.__real(hash, secret, type)
+
+
+def reject(manager:main.SessionManager, key:str):
+    with pytest.raises(exceptions.VerifyMismatchError):
+        asyncio.run(manager.authenticate(key))
+
+# cached valid key
+
+def test_manager_cache(monkeypatch):
+    verifier = Verifier(monkeypatch)
+    manager = main.SessionManager(hasher.hash("test"), hasher)
+
+    async def run():
+        first = await manager.authenticate("test")
+        second = await manager.authenticate("test")
+
+        assert first is not second
+        assert manager.get_session(second.id) is second
+
+    asyncio.run(run())
+
+    assert verifier.calls == 1
+
+# rejected key, during and after the reject TTL
+
+def test_manager_reject(monkeypatch):
+    monkeypatch.setattr(main, "_REJECT_CACHE_TTL", 0.2)
+
+    verifier = Verifier(monkeypatch)
+    manager = main.SessionManager(hasher.hash("test"), hasher)
+
+    reject(manager, "wrong")
+    reject(manager, "wrong")
+
+    assert verifier.calls == 1
+
+    time.sleep(0.3)
+    reject(manager, "wrong")
+
+    assert verifier.calls == 2
+
+# cache size limits
+
+def test_manager_cache_size(monkeypatch):
+    monkeypatch.setattr(main, "_VERIFY_CACHE_SIZE", 2)
+
+    verifier = Verifier(monkeypatch, True)
+    manager = main.SessionManager(hasher.hash("test"), hasher)
+
+    async def run():
+        for i in ("good0", "good1", "good2"):
+            await manager.authenticate(i)
+
+        # good0 was evicted, good2 is still cached
+        await manager.authenticate("good2")
+        assert verifier.calls == 3
+
+        await manager.authenticate("good0")
+        assert verifier.calls == 4
+
+    asyncio.run(run())
+
+    for i in ("bad0", "bad1", "bad2"):
+        reject(manager, i)
+
+    reject(manager, "bad2")
+    assert verifier.calls == 7
+
+    reject(manager, "bad0")
+    assert verifier.calls == 8
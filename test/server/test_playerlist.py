@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+
+# This file is part of LibLPME.
+
+# LibLPME is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3, or (at your option) any
+# later version.
+
+# LibLPME is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+# for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with LibLPME; see the file LICENSE.md.  If not see
+# <http://www.gnu.org/licenses/>.
+
+import pytest
+import requests
+
+def root(lpme:str) -> str:
+    return lpme.removesuffix("/lpme")
+
+# player joining a server
+
+def test_playerlist_join(lpme, auth):
+    res = requests.post(
+        f"{lpme}/plrlist/join",
+        json={"id": 101, "name": "Joining"},
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+
+    # the join handler is called with (session, player)
+    assert res.text == f"{auth.server_id} 101 Joining"
+
+    res = requests.get(f"{root(lpme)}/players/101")
+
+    assert res.text == auth.server_id
+
+# player leaving a server
+
+def test_playerlist_left(lpme, auth):
+    headers = {
+        "X-LPME-Session-Id": auth.session_id,
+        "X-LPME-Session": auth.session
+    }
+
+    res = requests.post(
+        f"{lpme}/plrlist/join",
+        json={"id": 102, "name": "Leaving"},
+        headers=headers
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+
+    res = requests.post(
+        f"{lpme}/plrlist/left",
+        json={"id": 102},
+        headers=headers
+    )
+
+    if not res.ok:
+        raise RuntimeError("Player leave was rejected")
+
+    # the leave handler gets the player stored on join
+    assert res.text == f"{auth.server_id} 102 Leaving"
+
+    res = requests.get(f"{root(lpme)}/players/102")
+
+    assert res.status_code == 404
+
+# player leaving a server they never joined
+
+def test_playerlist_left_missing(lpme, auth):
+    res = requests.post(
+        f"{lpme}/plrlist/left",
+        json={"id": 103},
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if res.status_code in range(500, 599):
+        raise ValueError("Server error for missing player")
+
+    assert res.status_code == 404
+
+# players removed when their server shuts down
+
+def test_playerlist_shutdown(lpme):
+    res = requests.post(
+        lpme,
+        headers={
+            "X-LPME-Token": "test"
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Server reject")
+
+    headers = {
+        "X-LPME-Session-Id": res.headers.get("X-LPME-Session-Id"),
+        "X-LPME-Session": res.headers.get("X-LPME-Session")
+    }
+
+    res = requests.post(
+        f"{lpme}/plrlist/join",
+        json={"id": 104, "name": "Shutdown"},
+        headers=headers
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+
+    res = requests.post(f"{lpme}/liblpme/shutdown", "", headers=headers)
+
+    assert res.status_code == 200
+
+    res = requests.get(f"{root(lpme)}/players/104")
+
+    assert res.status_code == 404
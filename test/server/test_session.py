@@ -16,6 +16,7 @@
 # along with LibLPME; see the file LICENSE.md.  If not see
 # <http://www.gnu.org/licenses/>.
 
+import time
 import pytest
 import requests
 
@@ -118,6 +119,22 @@ def test_session_badid_b(lpme, auth):
     if res.ok:
         raise RuntimeError("Invalid session was accepted")
 
+def test_session_badid_c(lpme, auth):
+    res = requests.post(
+        f"{lpme}/test",
+        "",
+        headers={
+            "X-LPME-Session-Id": "\u00b9",
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if res.status_code in range(500, 599):
+        raise ValueError("Server error for bad session")
+
+    if res.ok:
+        raise RuntimeError("Invalid session was accepted")
+
 # huge data
 
 def test_session_hugeid(lpme, auth):
@@ -187,3 +204,56 @@ def test_session_malformedses(lpme, auth):
 
         if res.ok:
             raise ValueError("Malformed session was accepted")
+
+# session used after shutdown
+
+def test_session_shutdown(lpme):
+    res = requests.post(
+        lpme,
+        headers={
+            "X-LPME-Token": "test"
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Server reject")
+
+    headers = {
+        "X-LPME-Session-Id": res.headers.get("X-LPME-Session-Id"),
+        "X-LPME-Session": res.headers.get("X-LPME-Session")
+    }
+    server_id = res.headers.get("X-LPME-Server-Id")
+
+    res = requests.post(f"{lpme}/liblpme/shutdown", "", headers=headers)
+
+    assert res.status_code == 200
+
+    res = requests.post(f"{lpme}/test", "", headers=headers)
+
+    assert res.status_code == 401
+
+    # shutdown handlers run in the background
+    for i in range(10):
+        res = requests.get(f"{lpme.removesuffix('/lpme')}/ended/{server_id}")
+        if res.ok:
+            break
+        time.sleep(0.1)
+
+    assert res.ok
+
+# state attached to a session on start
+
+def test_session_state(lpme, auth):
+    res = requests.post(
+        f"{lpme}/state",
+        "",
+        headers={
+            "X-LPME-Session-Id": auth.session_id,
+            "X-LPME-Session": auth.session
+        }
+    )
+
+    if not res.ok:
+        raise RuntimeError("Valid session was rejected")
+
+    assert res.text == "ok"